@@ -0,0 +1,209 @@
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts change so stale cached responses are never served
+PROMPT_VERSION = "v2"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# If set, cached payloads live in Redis and are shared across instances; otherwise in-process
+REDIS_URL = os.getenv("REDIS_URL")
+# Upper bound on keys held by the in-process store; expired keys are swept periodically
+MEMORY_CACHE_MAX_KEYS = int(os.getenv("MEMORY_CACHE_MAX_KEYS", "10000"))
+_SWEEP_EVERY = 256
+
+
+class _MemoryStore:
+    """
+    Minimal in-process stand-in for the subset of the Redis API we use (strings and hashes).
+    """
+
+    def __init__(self, max_keys: int = MEMORY_CACHE_MAX_KEYS):
+        # key -> (expires_at, str value or dict for hashes)
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+        self._writes = 0
+
+    def _on_write(self):
+        # called with the lock held: drop expired keys every few writes, then the
+        # soonest-expiring ones if still over the cap
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY and len(self._data) <= self._max_keys:
+            return
+        now = time.time()
+        for k in [k for k, (exp, _) in self._data.items() if exp < now]:
+            del self._data[k]
+        overflow = len(self._data) - self._max_keys
+        if overflow > 0:
+            for k, _ in sorted(self._data.items(), key=lambda kv: kv[1][0])[:overflow]:
+                del self._data[k]
+
+    def _live(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] < time.time():
+            del self._data[key]
+            return None
+        return item[1]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._live(key)
+            return value if isinstance(value, str) else None
+
+    def setex(self, key: str, ttl: int, value: str):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._on_write()
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for k in keys:
+                self._data.pop(k, None)
+
+    def hset(self, name: str, key: str, value: str):
+        with self._lock:
+            h = self._live(name)
+            if not isinstance(h, dict):
+                h = {}
+                self._data[name] = (math.inf, h)
+            h[key] = value
+            self._on_write()
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self._lock:
+            h = self._live(name)
+            return dict(h) if isinstance(h, dict) else {}
+
+    def hdel(self, name: str, *keys: str):
+        with self._lock:
+            h = self._live(name)
+            if isinstance(h, dict):
+                for k in keys:
+                    h.pop(k, None)
+
+    def expire(self, name: str, ttl: int):
+        with self._lock:
+            item = self._data.get(name)
+            if item is not None:
+                self._data[name] = (time.time() + ttl, item[1])
+
+
+def _make_store():
+    if REDIS_URL:
+        import redis
+
+        logger.info("Using Redis cache at %s", REDIS_URL)
+        return redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _MemoryStore()
+
+
+store = _make_store()
+
+
+def cache_key(*parts: str) -> str:
+    return hashlib.sha256("::".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_json(key: str) -> Optional[Any]:
+    raw = store.get(key)
+    return json.loads(raw) if raw else None
+
+
+def set_json(key: str, value: Any, ttl: int = CACHE_TTL_SECONDS):
+    store.setex(key, ttl, json.dumps(value, default=str))
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    if not na or not nb:
+        return 0.0
+    return dot / (na * nb)
+
+
+class SemanticCache:
+    """
+    Response cache for aquery_rag, namespaced per rag corpus.
+    Exact (normalized) repeats hit on the hash key; paraphrases hit when the question
+    embedding is within `threshold` cosine similarity of a cached question.
+    The per-corpus index (answer key -> embedding, expiry) is a hash in the store, so it is
+    shared across instances and survives restarts when Redis is configured.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: int = CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(rag_corpus_name: str, question: str) -> str:
+        return cache_key("query", PROMPT_VERSION, rag_corpus_name, normalize_question(question))
+
+    @staticmethod
+    def _index_key(rag_corpus_name: str) -> str:
+        return f"qidx:{rag_corpus_name}"
+
+    def get_exact(self, rag_corpus_name: str, question: str) -> Optional[Dict[str, Any]]:
+        return get_json(self._key(rag_corpus_name, question))
+
+    def find_similar(self, rag_corpus_name: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        index_key = self._index_key(rag_corpus_name)
+        now = time.time()
+        best_key, best_sim = None, 0.0
+        expired = []
+        for key, raw in store.hgetall(index_key).items():
+            entry = json.loads(raw)
+            if entry["exp"] <= now:
+                expired.append(key)
+                continue
+            if not entry["emb"]:
+                continue
+            sim = _cosine(embedding, entry["emb"])
+            if sim > best_sim:
+                best_key, best_sim = key, sim
+        if expired:
+            store.hdel(index_key, *expired)
+        if best_key is None or best_sim < self.threshold:
+            return None
+        logger.info("Semantic cache hit for %s (similarity %.3f)", rag_corpus_name, best_sim)
+        return get_json(best_key)
+
+    def save(self, rag_corpus_name: str, question: str, payload: Dict[str, Any], embedding: Optional[List[float]] = None):
+        key = self._key(rag_corpus_name, question)
+        set_json(key, payload, self.ttl)
+        # keys are indexed even without an embedding so invalidate() can drop them
+        index_key = self._index_key(rag_corpus_name)
+        store.hset(index_key, key, json.dumps({"emb": embedding, "exp": time.time() + self.ttl}))
+        store.expire(index_key, self.ttl)
+
+    def invalidate(self, rag_corpus_name: str):
+        index_key = self._index_key(rag_corpus_name)
+        keys = list(store.hgetall(index_key))
+        store.delete(*keys, index_key)
+        logger.info("Invalidated %d cached answers for %s", len(keys), rag_corpus_name)
+
+
+semantic_cache = SemanticCache()
+
+
+def summary_key(md5_hash: str) -> str:
+    return f"sum:{PROMPT_VERSION}:md5:{md5_hash}"
+
+
+def corpus_source_key(rag_corpus_name: str) -> str:
+    # lets /query rebuild a corpus that has been garbage-collected
+    return f"src:{rag_corpus_name}"
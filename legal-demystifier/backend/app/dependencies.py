@@ -0,0 +1,22 @@
+import asyncio
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request
+
+from .jobs import verify_worker_token
+
+from .rag_client import VertexRAGClient
+
+
+def get_rag(request: Request) -> VertexRAGClient:
+    """Shared VertexRAGClient created at startup (see main.py)."""
+    return request.app.state.rag
+
+
+async def require_cloud_tasks(
+    authorization: Optional[str] = Header(None),
+    x_cloudtasks_queuename: Optional[str] = Header(None),
+):
+    """Reject anything but an authenticated delivery from our Cloud Tasks queue."""
+    if not await asyncio.to_thread(verify_worker_token, authorization, x_cloudtasks_queuename):
+        raise HTTPException(status_code=403, detail="Forbidden")
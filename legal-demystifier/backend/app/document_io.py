@@ -1,30 +1,115 @@
 import os
+import logging
+import threading
+from typing import Optional
+import google.auth
+from google.api_core.exceptions import NotFound
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
 from datetime import timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-GCS_BUCKET = os.getenv("GCS_BUCKET", None)
-if not GCS_BUCKET:
-    raise RuntimeError("GCS_BUCKET environment variable not set")
+logger = logging.getLogger(__name__)
 
-storage_client = storage.Client()
+# Size of the HTTPS connection pool shared by all GCS calls in this process
+GCS_POOL_SIZE = int(os.getenv("GCS_POOL_SIZE", "32"))
 
 
-def generate_signed_upload_url(object_name: str, expires_minutes: int = 15):
+def _session(credentials) -> AuthorizedSession:
     """
-    Generate a V4 signed PUT URL for uploading the document to GCS.
+    Authorized HTTP session with a larger connection pool than the urllib3 default (10),
+    so concurrent uploads reuse warm TLS connections instead of waiting or re-handshaking.
     """
-    bucket = storage_client.bucket(GCS_BUCKET)
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(
+        pool_connections=GCS_POOL_SIZE,
+        pool_maxsize=GCS_POOL_SIZE,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def _make_client() -> storage.Client:
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    return storage.Client(project=project, credentials=credentials, _http=_session(credentials))
+
+
+# created on first use: building it at import would run ADC discovery (a metadata-server
+# round trip on Cloud Run) before the worker serves anything
+_client: Optional[storage.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> storage.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _make_client()
+    return _client
+
+
+def _bucket() -> storage.Bucket:
+    bucket_name = os.getenv("GCS_BUCKET")
+    if not bucket_name:
+        raise RuntimeError("GCS_BUCKET environment variable not set")
+    return get_client().bucket(bucket_name)
+
+
+UPLOAD_CONTENT_TYPE = "application/pdf"
+
+
+def generate_signed_upload_url(object_name: str, expires_minutes: int = 15, resumable: bool = True):
+    """
+    Generate a V4 signed URL for uploading the document straight to GCS.
+    With resumable=True the URL is for a POST with `x-goog-resumable: start`, which returns a
+    session URI the browser then PUTs chunks to; otherwise it is a single-shot PUT URL.
+    """
+    bucket = _bucket()
     blob = bucket.blob(object_name)
     url = blob.generate_signed_url(
         version="v4",
         expiration=timedelta(minutes=expires_minutes),
-        method="PUT",
-        content_type="application/pdf",
+        method="POST" if resumable else "PUT",
+        content_type=UPLOAD_CONTENT_TYPE,
+        headers={"x-goog-resumable": "start"} if resumable else None,
     )
     return url
 
 
-def delete_blob(object_name: str):
-    bucket = storage_client.bucket(GCS_BUCKET)
+def delete_blob(object_name: str) -> bool:
+    """
+    Delete the object. Idempotent: returns False if it was already gone.
+    """
+    bucket = _bucket()
     blob = bucket.blob(object_name)
-    blob.delete(if_generation_match=None)
+    try:
+        blob.delete(if_generation_match=None)
+    except NotFound:
+        return False
+    return True
+
+
+def get_object_hash(object_name: str):
+    """
+    Return the MD5 GCS already stores for the object, without downloading it.
+    None if the object doesn't exist or is a composite object (those only carry a
+    32-bit crc32c, which is too weak to use as a content key across users).
+    """
+    bucket = _bucket()
+    blob = bucket.get_blob(object_name)
+    if blob is None:
+        return None
+    return blob.md5_hash
+
+
+def warm_up():
+    """
+    Open a pooled connection and fetch an access token ahead of the first request.
+    """
+    try:
+        _bucket().exists()
+    except Exception:
+        logger.warning("GCS warm-up failed", exc_info=True)
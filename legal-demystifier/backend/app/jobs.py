@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import REDIS_URL, get_json, set_json
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+# Cloud Tasks queue that delivers /process jobs to the worker endpoint; when unset,
+# jobs run in-process as FastAPI background tasks (local dev)
+TASKS_QUEUE = os.getenv("CLOUD_TASKS_QUEUE")
+TASKS_LOCATION = os.getenv("CLOUD_TASKS_LOCATION", os.getenv("GCP_REGION", "us-central1"))
+# Public base URL of the service that hosts /process/worker, and the identity Cloud Tasks signs as
+WORKER_BASE_URL = os.getenv("WORKER_BASE_URL")
+TASKS_SERVICE_ACCOUNT = os.getenv("CLOUD_TASKS_SERVICE_ACCOUNT")
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+_tasks_client = None
+_tasks_lock = threading.Lock()
+
+
+def validate_config():
+    """
+    Called at startup. With a task queue, the worker that writes a job's state and the instance
+    answering status polls differ, so job state must live in Redis, and the worker endpoint
+    needs its URL and caller identity to authenticate deliveries.
+    """
+    if not TASKS_QUEUE:
+        return
+    missing = [
+        name
+        for name, value in (
+            ("REDIS_URL", REDIS_URL),
+            ("WORKER_BASE_URL", WORKER_BASE_URL),
+            ("CLOUD_TASKS_SERVICE_ACCOUNT", TASKS_SERVICE_ACCOUNT),
+        )
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(f"CLOUD_TASKS_QUEUE is set but {', '.join(missing)} is not")
+
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def set_job(job_id: str, status: str, result: Optional[Dict[str, Any]] = None, detail: Optional[str] = None):
+    set_json(_job_key(job_id), {"job_id": job_id, "status": status, "result": result, "detail": detail}, JOB_TTL_SECONDS)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_json(_job_key(job_id))
+
+
+def _get_tasks_client():
+    global _tasks_client
+    if _tasks_client is None:
+        with _tasks_lock:
+            if _tasks_client is None:
+                from google.cloud import tasks_v2
+
+                _tasks_client = tasks_v2.CloudTasksClient()
+    return _tasks_client
+
+
+def enqueue_process_job(payload: Dict[str, Any]) -> bool:
+    """
+    Push a job onto the Cloud Tasks queue targeting /process/worker.
+    Returns False when no queue is configured, so the caller can run the job in-process.
+    """
+    if not (TASKS_QUEUE and WORKER_BASE_URL):
+        return False
+    from google.cloud import tasks_v2
+
+    client = _get_tasks_client()
+    http_request = {
+        "http_method": tasks_v2.HttpMethod.POST,
+        "url": WORKER_BASE_URL.rstrip("/") + "/process/worker",
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(payload).encode("utf-8"),
+    }
+    # the worker endpoint only accepts requests carrying this token (see verify_worker_token)
+    http_request["oidc_token"] = {"service_account_email": TASKS_SERVICE_ACCOUNT, "audience": WORKER_BASE_URL}
+    parent = client.queue_path(os.getenv("GCP_PROJECT"), TASKS_LOCATION, TASKS_QUEUE)
+    client.create_task(parent=parent, task={"http_request": http_request})
+    logger.info("Enqueued process job %s", payload.get("job_id"))
+    return True
+
+
+def verify_worker_token(authorization: Optional[str], queue_name: Optional[str]) -> bool:
+    """
+    True if the request comes from our Cloud Tasks queue: a Google-signed OIDC token whose
+    audience is WORKER_BASE_URL and whose email is the configured task service account.
+    Blocking (may fetch Google's signing certs); call it from a worker thread.
+    """
+    if not (TASKS_QUEUE and WORKER_BASE_URL and TASKS_SERVICE_ACCOUNT):
+        # no queue configured: jobs run in-process and the worker endpoint is closed
+        return False
+    if queue_name != TASKS_QUEUE:
+        return False
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    from google.auth.transport import requests as google_requests
+    from google.oauth2 import id_token
+
+    try:
+        claims = id_token.verify_oauth2_token(
+            authorization.split(" ", 1)[1], google_requests.Request(), audience=WORKER_BASE_URL
+        )
+    except ValueError:
+        logger.warning("Rejected worker request with an invalid OIDC token")
+        return False
+    return claims.get("email") == TASKS_SERVICE_ACCOUNT and bool(claims.get("email_verified"))
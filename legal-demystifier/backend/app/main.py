@@ -1,10 +1,49 @@
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .middleware.privacy import PrivacyMiddleware
+from .rag_client import VertexRAGClient
+from .document_io import warm_up as warm_up_storage
+from .jobs import validate_config as validate_job_config
 from .routes import upload, process, query
 
+logger = logging.getLogger(__name__)
+
+# Startup warm-ups are best effort; never let a slow endpoint hold up serving
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT", "10"))
+
 app = FastAPI(title="Legal Demystifier Backend", version="0.1.0")
 
+
+@app.on_event("startup")
+def _init_clients():
+    validate_job_config()
+    # one Vertex client (vertexai.init + gRPC channels) per process; GCS helpers share
+    # document_io's client singleton
+    app.state.rag = VertexRAGClient()
+
+
+async def _bounded(fn, name: str):
+    try:
+        await asyncio.wait_for(asyncio.to_thread(fn), timeout=WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # the thread keeps running; startup just stops waiting for it
+        logger.warning("%s warm-up exceeded %.0fs; continuing startup", name, WARMUP_TIMEOUT_SECONDS)
+
+
+@app.on_event("startup")
+async def _warm_up():
+    # pay TLS + OAuth + channel setup for Vertex and GCS now, concurrently, not on the first request
+    await asyncio.gather(
+        _bounded(app.state.rag.warm_up, "Vertex"),
+        _bounded(warm_up_storage, "GCS"),
+    )
+
+
 # NOTE: restrict in production
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +52,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrivacyMiddleware)
 
 @app.get("/")
 def root():
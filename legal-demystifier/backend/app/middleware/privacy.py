@@ -1,14 +1,38 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import re
 import logging
 
 logger = logging.getLogger("privacy_middleware")
 
+# signed GCS URLs carry credentials in the query string
+_SIGNED_QUERY = re.compile(r"\?[^\s\"]*X-Goog-Signature[^\s\"]*", re.IGNORECASE)
+_SECRET_PAIR = re.compile(r"((?:authorization|x-goog-[\w-]+)\s*[:=]\s*)(?:bearer\s+)?[^\s&\",]+", re.IGNORECASE)
 
-class PrivacyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # remove or obfuscate sensitive headers before calling next
-        # example: don't log request body
-        response = await call_next(request)
-        # also scrub response if needed (avoid logging full doc text)
-        return response
+
+def redact(value: str) -> str:
+    value = _SIGNED_QUERY.sub("?<redacted>", value)
+    return _SECRET_PAIR.sub(r"\1<redacted>", value)
+
+
+class RedactingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = redact(record.msg)
+        if isinstance(record.args, tuple):
+            record.args = tuple(redact(a) if isinstance(a, str) else a for a in record.args)
+        return True
+
+
+class PrivacyMiddleware:
+    """
+    Pure ASGI middleware: scrubs credentials from access logs without wrapping the request,
+    so bodies and streaming responses pass through untouched (unlike BaseHTTPMiddleware).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        access_logger = logging.getLogger("uvicorn.access")
+        if not any(isinstance(f, RedactingFilter) for f in access_logger.filters):
+            access_logger.addFilter(RedactingFilter())
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
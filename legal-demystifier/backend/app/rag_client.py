@@ -1,15 +1,23 @@
 import os
 import time
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from cachetools import TTLCache
 
 # Vertex SDK per quickstart
 import vertexai
+from google.api_core.exceptions import NotFound
 from vertexai import rag
 from vertexai.generative_models import GenerativeModel, Tool
+from vertexai.language_models import TextEmbeddingModel
 
-from .utils import safe_parse_json, make_clause_provenance
+from .cache import semantic_cache
+from .risk_engine import batch_rule_scores, clause_from_llm, combined_score, rule_score_for_clause
+from .utils import safe_parse_json, ClauseStreamParser
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +26,96 @@ REGION = os.getenv("GCP_REGION", "us-central1")
 # Choose a Gemini model available in your project/region (change if needed)
 DEFAULT_MODEL = os.getenv("RAG_MODEL", "gemini-1.5-pro")  # or "gemini-2.0-flash-001"
 EMBEDDING_PUBLISHER_MODEL = os.getenv("EMBEDDING_MODEL", "publishers/google/models/text-embedding-003")  # example
+# How long to wait for imported files to finish indexing, and how often to poll
+IMPORT_TIMEOUT_SECONDS = float(os.getenv("RAG_IMPORT_TIMEOUT", "60"))
+IMPORT_POLL_INTERVAL = float(os.getenv("RAG_IMPORT_POLL_INTERVAL", "0.5"))
+# Embedding throughput for corpus imports; Vertex batches and parallelizes up to this rate (tune per region quota)
+EMBED_REQUESTS_PER_MIN = int(os.getenv("EMBED_REQUESTS_PER_MIN", "1000"))
+# Per-corpus GenerativeModel objects kept around between calls, and for how long
+MODEL_CACHE_SIZE = int(os.getenv("RAG_MODEL_CACHE_SIZE", "128"))
+MODEL_CACHE_TTL = int(os.getenv("RAG_MODEL_CACHE_TTL", "3600"))
+
+
+# prompt instructing JSON output, clause extraction, risk scoring (ask LLM to return numeric risk 0-100)
+_SUMMARY_PROMPT = """
+You are a helpful assistant that reads legal text (clauses) and returns structured JSON.
+Given the context retrieved from the provided documents, produce a JSON object with keys:
+- title: string or null
+- summary: short high-level summary of the document (3-5 sentences)
+- overall_risk_score: a number 0-100 representing overall document risk (higher = riskier)
+- clauses: an array of objects with keys:
+  - original: original clause text (string)
+  - simplified: simple, plain-language explanation (1-2 sentences)
+  - llm_score: a numeric risk estimate 0-100
+  - provenance: array of provenance objects with keys page (if available), start_offset (if available), text (snippet)
+Return ONLY valid JSON. Do not include backticks or explanation. 
+"""
+
+
+# fixed instructions first and the question last, so every query shares a byte-identical prefix
+_QUERY_PROMPT_PREFIX = (
+    "Using only the retrieved document context, answer the question concisely and cite any provenance "
+    "(page or snippet).\n"
+    "Return JSON: {'answer': string, 'provenance': [{'text':string}]}\n\n"
+    "Question: "
+)
+
+_SUMMARY_RETRIEVAL_QUERY = "Please provide a short summary of the document and list key clauses."
+
+
+def _failed_summary(rag_corpus_name: str) -> Dict[str, Any]:
+    return {
+        "title": None,
+        "summary": "Failed to summarize document",
+        "overall_risk_score": 50.0,
+        "rag_corpus_name": rag_corpus_name,
+        "clauses": [],
+    }
+
+
+def _overall_risk(parsed: Dict[str, Any], retrieval=None) -> float:
+    """
+    Model's overall risk, cross-checked against keyword scores of the retrieved passages when available.
+    The cross-check can only raise the score: passages without keyword hits say nothing about risk.
+    """
+    overall = float(parsed.get("overall_risk_score", 50.0))
+    chunk_scores = batch_rule_scores(_retrieval_texts(retrieval)) if retrieval is not None else []
+    if chunk_scores:
+        # riskiest retrieved passage acts as the rule-based document score
+        overall = max(overall, combined_score(overall, max(chunk_scores)))
+    return overall
+
+
+def _retrieval_texts(retrieval) -> List[str]:
+    """
+    Text of each retrieved chunk in a retrieval_query result (contexts.contexts[].text).
+    """
+    contexts = getattr(getattr(retrieval, "contexts", None), "contexts", None) or []
+    return [getattr(ctx, "text", "") or "" for ctx in contexts]
+
+
+def _is_not_found(e: BaseException) -> bool:
+    """
+    True if `e` reports a missing corpus. rag.retrieval_query wraps every API error in a
+    RuntimeError, so the NotFound is only visible as its cause.
+    """
+    return isinstance(e, NotFound) or isinstance(e.__cause__, NotFound)
+
+
+class CorpusIndexingError(RuntimeError):
+    """Raised when an imported document fails to index, or doesn't finish in time."""
+
+
+def _rag_file_state(rag_file) -> str:
+    """
+    Best-effort read of a RagFile's indexing state. Older SDKs don't expose it,
+    in which case a listed file is treated as ready.
+    """
+    status = getattr(rag_file, "file_status", None)
+    state = getattr(status, "state", None) if status is not None else getattr(rag_file, "state", None)
+    if state is None:
+        return "ACTIVE"
+    return getattr(state, "name", str(state)).upper()
 
 
 class VertexRAGClient:
@@ -26,11 +124,34 @@ class VertexRAGClient:
             raise RuntimeError("GCP_PROJECT env var not set")
         logger.info("Initializing Vertex AI for project=%s region=%s", PROJECT, REGION)
         vertexai.init(project=PROJECT, location=REGION)
+        self._embedding_model: Optional[TextEmbeddingModel] = None
+        # (rag_corpus_name, top_k) -> GenerativeModel bound to that corpus's retrieval tool;
+        # the TTL lets models for deleted corpora age out
+        self._models: "TTLCache[Tuple[str, int], GenerativeModel]" = TTLCache(maxsize=MODEL_CACHE_SIZE, ttl=MODEL_CACHE_TTL)
+        self._models_lock = threading.Lock()
 
-    def create_session_rag_corpus(self, gcs_uri: str, session_id: str, display_name: Optional[str] = None) -> str:
+    def warm_up(self):
+        """
+        Open the Vertex gRPC channel and fetch an ADC token ahead of the first request by issuing
+        a retrieval against a corpus id that doesn't exist. The expected error is ignored.
+        """
+        try:
+            rag.retrieval_query(
+                rag_resources=[rag.RagResource(rag_corpus=f"projects/{PROJECT}/locations/{REGION}/ragCorpora/0")],
+                text="warmup",
+                rag_retrieval_config=rag.RagRetrievalConfig(top_k=1),
+            )
+        except RuntimeError as e:
+            # retrieval_query wraps the expected NotFound in a RuntimeError
+            logger.debug("Vertex warm-up finished with %r", e.__cause__ or e)
+        except Exception as e:
+            logger.info("Vertex warm-up finished with %s", type(e).__name__)
+
+    async def create_session_rag_corpus(self, gcs_uri: str, session_id: str, display_name: Optional[str] = None) -> str:
         """
         Create a RAG corpus and import the file from GCS.
-        Returns rag_corpus.name string.
+        The blocking SDK calls run in a worker thread so the event loop stays free.
+        Returns rag_corpus.name string; raises CorpusIndexingError if the file doesn't index.
         """
         display_name = display_name or f"corpus_{session_id}"
         logger.info("Creating rag corpus %s and importing %s", display_name, gcs_uri)
@@ -40,30 +161,50 @@ class VertexRAGClient:
             vertex_prediction_endpoint=rag.VertexPredictionEndpoint(publisher_model=EMBEDDING_PUBLISHER_MODEL)
         )
 
-        rag_corpus = rag.create_corpus(
+        rag_corpus = await asyncio.to_thread(
+            rag.create_corpus,
             display_name=display_name,
             backend_config=rag.RagVectorDbConfig(rag_embedding_model_config=embedding_model_config),
         )
 
-        # import the file from GCS
-        rag.import_files(
+        # import the file from GCS; awaiting the long-running operation asynchronously rather than
+        # holding a thread on the blocking import_files call. Errors raise as import_files did.
+        operation = await rag.import_files_async(
             rag_corpus.name,
             [gcs_uri],
             transformation_config=rag.TransformationConfig(
                 chunking_config=rag.ChunkingConfig(chunk_size=512, chunk_overlap=100)
             ),
-            # optional throttle parameter
-            max_embedding_requests_per_min=1000,
+            max_embedding_requests_per_min=EMBED_REQUESTS_PER_MIN,
         )
+        response = await operation.result(timeout=IMPORT_TIMEOUT_SECONDS)
+        if getattr(response, "failed_rag_files_count", 0):
+            raise CorpusIndexingError(f"Failed to import {gcs_uri} into corpus {rag_corpus.name}")
 
-        # the import is asynchronous; you can list files or poll
-        # For simplicity, wait briefly for indexing (production: poll rag.list_files())
-        logger.info("Waiting for corpus import/indexing (sleeping 6s)...")
-        time.sleep(6)
+        await self._wait_for_indexing(rag_corpus.name)
 
         logger.info("Created rag_corpus: %s", rag_corpus.name)
         return rag_corpus.name
 
+    async def _wait_for_indexing(self, rag_corpus_name: str):
+        """
+        Poll rag.list_files() until every imported file reports ACTIVE.
+        Raises CorpusIndexingError if a file reports ERROR or the timeout is reached.
+        """
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < IMPORT_TIMEOUT_SECONDS:
+            files = await asyncio.to_thread(lambda: list(rag.list_files(rag_corpus_name)))
+            states = [_rag_file_state(f) for f in files]
+            if "ERROR" in states:
+                raise CorpusIndexingError(f"Indexing failed for a file in corpus {rag_corpus_name}")
+            if states and all(st == "ACTIVE" for st in states):
+                logger.info("Corpus %s indexed in %.1fs", rag_corpus_name, time.monotonic() - t0)
+                return
+            await asyncio.sleep(IMPORT_POLL_INTERVAL)
+        raise CorpusIndexingError(
+            f"Timed out after {IMPORT_TIMEOUT_SECONDS:.0f}s waiting for corpus {rag_corpus_name} to index"
+        )
+
     def _make_rag_retrieval_tool(self, rag_corpus_name: str, top_k: int = 4) -> Tool:
         """
         Return a Tool that wraps retrieval from the rag corpus. The Tool can be provided to a GenerativeModel.
@@ -78,136 +219,235 @@ class VertexRAGClient:
         rag_retrieval_tool = Tool.from_retrieval(retrieval=retrieval)
         return rag_retrieval_tool
 
-    def summarize_document(self, rag_corpus_name: str) -> Dict[str, Any]:
+    def _get_rag_model(self, rag_corpus_name: str, top_k: int) -> GenerativeModel:
         """
-        Ask the model to produce a structured JSON summary with clause-level simplified texts.
-        Returns a dict matching DocumentSummary schema.
+        Return a GenerativeModel wired to the corpus's retrieval tool, reusing a cached one if present.
         """
-        logger.info("Summarizing rag corpus %s", rag_corpus_name)
-        try:
-            # Create retrieval tool
-            tool = self._make_rag_retrieval_tool(rag_corpus_name, top_k=6)
-
-            # instantiate model with tool
-            rag_model = GenerativeModel(model_name=DEFAULT_MODEL, tools=[tool])
+        key = (rag_corpus_name, top_k)
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+        tool = self._make_rag_retrieval_tool(rag_corpus_name, top_k=top_k)
+        model = GenerativeModel(model_name=DEFAULT_MODEL, tools=[tool])
+        with self._models_lock:
+            self._models[key] = model
+        return model
 
-            # prompt instructing JSON output, clause extraction, risk scoring (ask LLM to return numeric risk 0-100)
-            prompt = """
-You are a helpful assistant that reads legal text (clauses) and returns structured JSON.
-Given the context retrieved from the provided documents, produce a JSON object with keys:
-- title: string or null
-- summary: short high-level summary of the document (3-5 sentences)
-- overall_risk_score: a number 0-100 representing overall document risk (higher = riskier)
-- clauses: an array of objects with keys:
-  - original: original clause text (string)
-  - simplified: simple, plain-language explanation (1-2 sentences)
-  - llm_score: a numeric risk estimate 0-100
-  - provenance: array of provenance objects with keys page (if available), start_offset (if available), text (snippet)
-Return ONLY valid JSON. Do not include backticks or explanation. 
-"""
+    def forget_corpus(self, rag_corpus_name: str):
+        """
+        Drop cached models for a corpus that is being deleted.
+        """
+        with self._models_lock:
+            for key in [k for k in self._models if k[0] == rag_corpus_name]:
+                self._models.pop(key, None)
 
-            # generate content (with the retrieval tool so model can access doc chunks)
-            response = rag_model.generate_content(prompt)
-            text = response.text or ""
-            parsed = safe_parse_json(text)
-            if not parsed:
-                # fallback: ask retrieval_query to get raw retrieval result + attempt light summary
-                logger.warning("Failed to parse JSON from model. Falling back to retrieval_query.")
-                retrieval = rag.retrieval_query(
-                    rag_resources=[rag.RagResource(rag_corpus=rag_corpus_name)],
-                    text="Please provide a short summary of the document and list key clauses.",
-                    rag_retrieval_config=rag.RagRetrievalConfig(top_k=4),
-                )
-                # Construct minimal structured fallback
-                summary_text = getattr(retrieval, "text", "") or "Summary unavailable"
-                clauses = []
-                parsed_fallback = {
-                    "title": None,
-                    "summary": summary_text,
-                    "overall_risk_score": 50.0,
-                    "rag_corpus_name": rag_corpus_name,
-                    "clauses": clauses,
-                }
-                return parsed_fallback
-
-            # Convert model-provided clauses to our schema
-            clauses_out = []
-            for c in parsed.get("clauses", []):
-                llm_score = float(c.get("llm_score", 50)) if c.get("llm_score") is not None else 50.0
-                provs = c.get("provenance", [])
-                clauses_out.append(
-                    {
-                        "original": c.get("original", ""),
-                        "simplified": c.get("simplified", ""),
-                        "risk": "high" if llm_score >= 66 else "medium" if llm_score >= 33 else "low",
-                        "score": llm_score,
-                        "provenance": provs,
-                    }
-                )
-
-            out = {
-                "title": parsed.get("title"),
-                "summary": parsed.get("summary", ""),
-                "overall_risk_score": float(parsed.get("overall_risk_score", 50.0)),
-                "rag_corpus_name": rag_corpus_name,
-                "clauses": clauses_out,
-            }
-            return out
+    def _generate_summary_text(self, rag_corpus_name: str) -> str:
+        # model with the corpus retrieval tool attached, so it can access doc chunks
+        rag_model = self._get_rag_model(rag_corpus_name, top_k=6)
+        response = rag_model.generate_content(_SUMMARY_PROMPT)
+        return response.text or ""
 
-        except Exception as e:
-            logger.exception("summarize_document failed")
-            return {
+    def _build_summary(self, rag_corpus_name: str, text: str, retrieval=None) -> Dict[str, Any]:
+        """
+        Turn the model's JSON text into a DocumentSummary dict. `retrieval` is an optional
+        retrieval_query result for the document; its chunks are keyword-scored to cross-check
+        the model's overall risk, and it backs the fallback summary when the JSON is unusable.
+        """
+        parsed = safe_parse_json(text)
+        if not parsed:
+            # fallback: use the raw retrieval result for a light summary
+            logger.warning("Failed to parse JSON from model. Falling back to retrieval_query.")
+            if retrieval is None:
+                retrieval = self._retrieve(rag_corpus_name, _SUMMARY_RETRIEVAL_QUERY, 4)
+            # Construct minimal structured fallback
+            summary_text = getattr(retrieval, "text", "") or "Summary unavailable"
+            clauses = []
+            parsed_fallback = {
                 "title": None,
-                "summary": "Failed to summarize document",
+                "summary": summary_text,
                 "overall_risk_score": 50.0,
                 "rag_corpus_name": rag_corpus_name,
-                "clauses": [],
+                "clauses": clauses,
             }
+            return parsed_fallback
+
+        # Convert model-provided clauses to our schema
+        raw_clauses = parsed.get("clauses") or []
+        # one batched keyword scan for all clauses, blended with the LLM score below
+        rule_scores = batch_rule_scores([c.get("original", "") for c in raw_clauses])
+        clauses_out = [None] * len(raw_clauses)
+        for i, c in enumerate(raw_clauses):
+            clauses_out[i] = clause_from_llm(c, rule_scores[i])
+
+        out = {
+            "title": parsed.get("title"),
+            "summary": parsed.get("summary", ""),
+            "overall_risk_score": _overall_risk(parsed, retrieval),
+            "rag_corpus_name": rag_corpus_name,
+            "clauses": clauses_out,
+        }
+        return out
+
+    def stream_summary(self, rag_corpus_name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of asummarize_document. Yields ("clause", Clause dict) as soon as each
+        clause object is complete in the model output, then a final ("done", summary fields
+        without clauses). Synchronous: iterate it from a worker thread.
+        """
+        logger.info("Streaming summary for rag corpus %s", rag_corpus_name)
+        rag_model = self._get_rag_model(rag_corpus_name, top_k=6)
+        # same retrieval cross-check as asummarize_document, running alongside the stream,
+        # so both paths produce (and cache) the same overall_risk_score
+        pool = ThreadPoolExecutor(max_workers=1)
+        retrieval_future = pool.submit(self._retrieve, rag_corpus_name, _SUMMARY_RETRIEVAL_QUERY, 4)
+        stream = rag_model.generate_content(_SUMMARY_PROMPT, stream=True)
+        try:
+            parser = ClauseStreamParser()
+            parts = []
+            for chunk in stream:
+                try:
+                    text = chunk.text or ""
+                except ValueError:
+                    # chunk without text (e.g. only safety metadata)
+                    continue
+                parts.append(text)
+                for c in parser.feed(text):
+                    yield "clause", clause_from_llm(c, rule_score_for_clause(c.get("original", "")))
 
-    def query_rag(self, rag_corpus_name: str, question: str, top_k: int = 4) -> Dict[str, Any]:
+            try:
+                retrieval = retrieval_future.result()
+            except Exception as e:
+                logger.warning("Summary retrieval pass failed: %s", e)
+                retrieval = None
+        finally:
+            # if the consumer closes this generator early, release the model stream and don't
+            # wait on the side retrieval in whichever thread runs the close
+            if hasattr(stream, "close"):
+                stream.close()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        parsed = safe_parse_json("".join(parts)) or {}
+        yield "done", {
+            "title": parsed.get("title"),
+            "summary": parsed.get("summary", ""),
+            "overall_risk_score": _overall_risk(parsed, retrieval),
+            "rag_corpus_name": rag_corpus_name,
+        }
+
+    async def asummarize_document(self, rag_corpus_name: str) -> Dict[str, Any]:
+        """
+        Ask the model to produce a structured JSON summary with clause-level simplified texts.
+        Returns a dict matching DocumentSummary schema. A retrieval-only pass runs concurrently
+        with generation, so the rule-based cross-check (and the fallback) cost max(t_llm, t_retrieve).
+        """
+        logger.info("Summarizing rag corpus %s", rag_corpus_name)
+        try:
+            gen_task = asyncio.create_task(asyncio.to_thread(self._generate_summary_text, rag_corpus_name))
+            retrieval_task = asyncio.create_task(
+                asyncio.to_thread(self._retrieve, rag_corpus_name, _SUMMARY_RETRIEVAL_QUERY, 4)
+            )
+            text, retrieval = await asyncio.gather(gen_task, retrieval_task, return_exceptions=True)
+            if isinstance(text, BaseException):
+                raise text
+            if isinstance(retrieval, BaseException):
+                logger.warning("Summary retrieval pass failed: %s", retrieval)
+                retrieval = None
+            return self._build_summary(rag_corpus_name, text, retrieval)
+        except Exception:
+            logger.exception("asummarize_document failed")
+            return _failed_summary(rag_corpus_name)
+
+    def _embed_question(self, question: str) -> Optional[List[float]]:
+        """
+        Embed a question for the semantic cache. Returns None on failure so the
+        cache degrades to exact-match lookups instead of failing the query.
+        """
+        try:
+            if self._embedding_model is None:
+                self._embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_PUBLISHER_MODEL.rsplit("/", 1)[-1])
+            return self._embedding_model.get_embeddings([question])[0].values
+        except Exception:
+            logger.warning("Question embedding failed; semantic cache limited to exact matches", exc_info=True)
+            return None
+
+    def _retrieve(self, rag_corpus_name: str, question: str, top_k: int):
+        return rag.retrieval_query(
+            rag_resources=[rag.RagResource(rag_corpus=rag_corpus_name)],
+            text=question,
+            rag_retrieval_config=rag.RagRetrievalConfig(top_k=top_k),
+        )
+
+    def _generate_answer(self, rag_corpus_name: str, question: str, top_k: int) -> str:
+        rag_model = self._get_rag_model(rag_corpus_name, top_k)
+
+        gen_resp = rag_model.generate_content(_QUERY_PROMPT_PREFIX + question)
+        return gen_resp.text or ""
+
+    @staticmethod
+    def _build_answer(retrieval_result, gen_text: str) -> Dict[str, Any]:
+        # gather evidence from retrieval_result
+        evidence = []
+        # retrieval_result may have a .responses or .items; we attempt to extract text
+        if hasattr(retrieval_result, "items"):
+            for it in retrieval_result.items:
+                # each item might have a 'content' attribute or similar
+                try:
+                    evidence.append({"text": getattr(it, "text", str(it)), "metadata": getattr(it, "metadata", None)})
+                except Exception:
+                    evidence.append({"text": str(it)})
+        else:
+            # fallback: include raw repr
+            evidence.append({"text": str(retrieval_result)})
+
+        parsed = safe_parse_json(gen_text)
+        if parsed:
+            answer = parsed.get("answer", gen_text)
+            provs = parsed.get("provenance", evidence)
+        else:
+            answer = gen_text or str(retrieval_result)
+            provs = evidence
+
+        return {"answer": answer, "evidence": provs}
+
+    async def aquery_rag(self, rag_corpus_name: str, question: str, top_k: int = 4) -> Dict[str, Any]:
         """
         Answer a question grounded on documents in the rag corpus.
         Returns: {'answer': str, 'evidence': [ {text, page, start_offset} ] }
+        Retrieval and generation don't depend on each other, so both Vertex calls run
+        concurrently in worker threads. Raises NotFound if the corpus no longer exists.
         """
         logger.info("Running query against %s: %s", rag_corpus_name, question)
         try:
-            # 1) direct retrieval (this returns retrieval results)
-            retrieval_result = rag.retrieval_query(
-                rag_resources=[rag.RagResource(rag_corpus=rag_corpus_name)],
-                text=question,
-                rag_retrieval_config=rag.RagRetrievalConfig(top_k=top_k),
+            # cache calls hit Redis and scan embeddings, so keep them off the event loop;
+            # only pay for an embedding when the exact-key lookup misses
+            cached = await asyncio.to_thread(semantic_cache.get_exact, rag_corpus_name, question)
+            if cached is not None:
+                return cached
+            embedding = await asyncio.to_thread(self._embed_question, question)
+            if embedding:
+                cached = await asyncio.to_thread(semantic_cache.find_similar, rag_corpus_name, embedding)
+                if cached is not None:
+                    return cached
+            retrieval_result, gen_text = await asyncio.gather(
+                asyncio.to_thread(self._retrieve, rag_corpus_name, question, top_k),
+                asyncio.to_thread(self._generate_answer, rag_corpus_name, question, top_k),
+                return_exceptions=True,
             )
-
-            # gather evidence from retrieval_result
-            evidence = []
-            # retrieval_result may have a .responses or .items; we attempt to extract text
-            if hasattr(retrieval_result, "items"):
-                for it in retrieval_result.items:
-                    # each item might have a 'content' attribute or similar
-                    try:
-                        evidence.append({"text": getattr(it, "text", str(it)), "metadata": getattr(it, "metadata", None)})
-                    except Exception:
-                        evidence.append({"text": str(it)})
-            else:
-                # fallback: include raw repr
-                evidence.append({"text": str(retrieval_result)})
-
-            # 2) use the retrieval tool + model to generate an answer using the retrieved context
-            tool = self._make_rag_retrieval_tool(rag_corpus_name, top_k=top_k)
-            rag_model = GenerativeModel(model_name=DEFAULT_MODEL, tools=[tool])
-
-            prompt = f"Using only the retrieved document context, answer the question concisely and cite any provenance (page or snippet). Question: {question}\n\nReturn JSON: {{'answer': string, 'provenance': [{{'text':string}}]}}"
-            gen_resp = rag_model.generate_content(prompt)
-            gen_text = gen_resp.text or ""
-            parsed = safe_parse_json(gen_text)
-            if parsed:
-                answer = parsed.get("answer", gen_text)
-                provs = parsed.get("provenance", evidence)
-            else:
-                answer = gen_text or str(retrieval_result)
-                provs = evidence
-
-            return {"answer": answer, "evidence": provs}
-        except Exception as e:
-            logger.exception("query_rag failed")
+            # check both legs, so a missing corpus is reported whichever call failed first
+            failures = [r for r in (retrieval_result, gen_text) if isinstance(r, BaseException)]
+            for err in failures:
+                if _is_not_found(err):
+                    raise NotFound(f"rag corpus {rag_corpus_name} not found") from err
+            if failures:
+                raise failures[0]
+            resp = self._build_answer(retrieval_result, gen_text)
+            await asyncio.to_thread(semantic_cache.save, rag_corpus_name, question, resp, embedding)
+            return resp
+        except NotFound:
+            # corpus was garbage-collected; the caller can rebuild it from the source document
+            logger.warning("rag corpus %s not found", rag_corpus_name)
+            raise
+        except Exception:
+            logger.exception("aquery_rag failed")
             return {"answer": "Failed to answer question due to an internal error.", "evidence": []}
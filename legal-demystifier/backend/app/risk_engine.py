@@ -1,26 +1,139 @@
 import re
+from bisect import bisect_right
+from typing import Any, Dict, List
 
 RISK_KEYWORDS = {
     "high": [r"penalt(?:y|ies)", r"indemnif", r"liabilit", r"arbitration", r"waiv", r"class action waiver"],
     "medium": [r"early termination fee", r"renewal", r"auto-?renew", r"late fee", r"governing law"],
 }
+RISK_WEIGHTS = {"high": 40, "medium": 15}
+
+# flat (pattern, weight) list; the list index is the pattern id used by the matchers below
+_PATTERNS = [(p, RISK_WEIGHTS[level]) for level, pats in RISK_KEYWORDS.items() for p in pats]
+_WEIGHTS = [w for _, w in _PATTERNS]
+
+# Prefer a multi-pattern DFA (one linear pass per clause); fall back to re2's set matcher,
+# then to the stdlib. All three report each pattern at most once per clause.
+try:
+    import hyperscan
+
+    _hs_db = hyperscan.Database()
+    _hs_db.compile(
+        expressions=[p.encode() for p, _ in _PATTERNS],
+        ids=list(range(len(_PATTERNS))),
+        elements=len(_PATTERNS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(_PATTERNS),
+    )
+    # batch scans need every match (not one per pattern per buffer) so hits can be attributed to clauses
+    _hs_batch_db = hyperscan.Database()
+    _hs_batch_db.compile(
+        expressions=[p.encode() for p, _ in _PATTERNS],
+        ids=list(range(len(_PATTERNS))),
+        elements=len(_PATTERNS),
+        flags=[hyperscan.HS_FLAG_CASELESS] * len(_PATTERNS),
+    )
+    MATCHER = "hyperscan"
+except ImportError:
+    _hs_db = _hs_batch_db = None
+    try:
+        import re2
+
+        _re2_opts = re2.Options()
+        _re2_opts.case_sensitive = False
+        _re2_set = re2.Set.SearchSet(_re2_opts)
+        for p, _ in _PATTERNS:
+            _re2_set.Add(p)
+        _re2_set.Compile()
+        MATCHER = "re2"
+    except ImportError:
+        _re2_set = None
+        MATCHER = "re"
+
+
+# precompiled stdlib fallback, grouped by weight
+_HIGH = [re.compile(p, re.IGNORECASE) for p in RISK_KEYWORDS["high"]]
+_MEDIUM = [re.compile(p, re.IGNORECASE) for p in RISK_KEYWORDS["medium"]]
+_COMPILED = ((_HIGH, RISK_WEIGHTS["high"]), (_MEDIUM, RISK_WEIGHTS["medium"]))
+
+
+def _matched_ids(text: str):
+    if _hs_db is not None:
+        ids = []
+
+        def on_match(id_, start, end, flags, context):
+            ids.append(id_)
+
+        _hs_db.scan(text.encode("utf-8"), match_event_handler=on_match)
+        return ids
+    return _re2_set.Match(text) or []
 
 
 def rule_score_for_clause(text: str) -> float:
     score = 0.0
-    t = text.lower()
-    for kw in RISK_KEYWORDS["high"]:
-        if re.search(kw, t):
-            score += 40
-    for kw in RISK_KEYWORDS["medium"]:
-        if re.search(kw, t):
-            score += 15
+    if MATCHER == "re":
+        for pats, w in _COMPILED:
+            for p in pats:
+                if p.search(text):
+                    score += w
+                    if score >= 100.0:
+                        return 100.0
+        return score
+    for i in _matched_ids(text):
+        score += _WEIGHTS[i]
     return min(100.0, score)
 
 
+def batch_rule_scores(clauses: List[str]) -> List[float]:
+    """
+    Rule scores for many clauses at once. With Hyperscan the clauses are joined with a
+    separator and scanned in a single call; each hit is mapped back to its clause by offset.
+    """
+    if _hs_batch_db is None:
+        return [rule_score_for_clause(c) for c in clauses]
+
+    encoded = [c.encode("utf-8") for c in clauses]
+    starts = []
+    pos = 0
+    for e in encoded:
+        starts.append(pos)
+        pos += len(e) + 1  # + separator
+    seen = set()
+    scores = [0.0] * len(clauses)
+
+    def on_match(id_, start, end, flags, context):
+        idx = bisect_right(starts, end - 1) - 1
+        if (idx, id_) not in seen:
+            seen.add((idx, id_))
+            scores[idx] += _WEIGHTS[id_]
+
+    _hs_batch_db.scan(b"\x1f".join(encoded), match_event_handler=on_match)
+    return [min(100.0, s) for s in scores]
+
+
 def combined_score(llm_score: float, rule_score: float, w_llm: float = 0.6) -> float:
     """
     Combine LLM-provided risk score with rule-based score.
     Expect both scores in 0-100 range.
     """
     return float(max(0.0, min(100.0, w_llm * llm_score + (1 - w_llm) * rule_score)))
+
+
+def risk_label(score: float) -> str:
+    return "high" if score >= 66 else ("medium" if score >= 33 else "low")
+
+
+def clause_from_llm(c: Dict[str, Any], rule_score: float) -> Dict[str, Any]:
+    """
+    Map one model-provided clause to the Clause schema. The label follows the LLM's own score
+    (a blended score without keyword hits tops out at 60 and could never be "high");
+    `score` is the LLM score blended with the rule score.
+    """
+    llm_score = c.get("llm_score")
+    llm_score = 50.0 if llm_score is None else float(llm_score)
+    return {
+        "original": c.get("original", ""),
+        "simplified": c.get("simplified", ""),
+        "risk": risk_label(llm_score),
+        "score": combined_score(llm_score, rule_score),
+        "provenance": c.get("provenance") or [],
+    }
@@ -1,21 +1,151 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+import logging
 import uuid
 import os
 from typing import Dict
 
-from ..schemas import ProcessRequest, DocumentSummary
+from ..schemas import ProcessRequest, ProcessJob, JobAccepted, JobStatus
+from ..document_io import get_object_hash
+from ..cache import get_json, set_json, summary_key, corpus_source_key
+from ..dependencies import get_rag, require_cloud_tasks
+from ..jobs import set_job, get_job, enqueue_process_job, PENDING, RUNNING, DONE, FAILED
 from ..rag_client import VertexRAGClient
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/process", tags=["process"])
-rag = VertexRAGClient()
 
 
-@router.post("", response_model=DocumentSummary)
-async def process_doc(req: ProcessRequest):
-    if not req.object_name:
-        raise HTTPException(status_code=400, detail="object_name required")
+async def _cached_summary(object_name: str):
+    """
+    Returns (cache key, cached summary or None). Identical bytes -> identical summary.
+    """
+    content_hash = await asyncio.to_thread(get_object_hash, object_name)
+    key = summary_key(content_hash) if content_hash else None
+    return key, (await asyncio.to_thread(get_json, key) if key else None)
+
+
+async def _build_corpus(rag: VertexRAGClient, req: ProcessRequest, key) -> str:
     session_id = req.session_id or "sess-" + str(uuid.uuid4())
     gcs_uri = f"gs://{os.getenv('GCS_BUCKET')}/{req.object_name}"
-    rag_corpus = rag.create_session_rag_corpus(gcs_uri, session_id)
-    structured = rag.summarize_document(rag_corpus)
+    rag_corpus = await rag.create_session_rag_corpus(gcs_uri, session_id)
+    await asyncio.to_thread(set_json, corpus_source_key(rag_corpus), {"gcs_uri": gcs_uri, "summary_key": key})
+    return rag_corpus
+
+
+def _sse(data: Dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, default=str)}\n\n"
+
+
+async def _run_pipeline(rag: VertexRAGClient, req: ProcessRequest) -> Dict:
+    # skip the whole corpus + LLM pipeline on a hit
+    key, cached = await _cached_summary(req.object_name)
+    if cached is not None:
+        return cached
+
+    rag_corpus = await _build_corpus(rag, req, key)
+    structured = await rag.asummarize_document(rag_corpus)
+    # only cache real summaries, not the failure fallbacks
+    if key and structured.get("clauses"):
+        await asyncio.to_thread(set_json, key, structured)
     return structured
+
+
+async def _run_job(rag: VertexRAGClient, job: ProcessJob):
+    # job records live in Redis when configured; keep those round trips off the event loop
+    await asyncio.to_thread(set_job, job.job_id, RUNNING)
+    try:
+        structured = await _run_pipeline(rag, job)
+    except Exception:
+        logger.exception("process job %s failed", job.job_id)
+        await asyncio.to_thread(set_job, job.job_id, FAILED, detail="Failed to process document")
+        return
+    await asyncio.to_thread(set_job, job.job_id, DONE, result=structured)
+
+
+@router.post("", status_code=202, response_model=JobAccepted)
+async def process_doc(req: ProcessRequest, background_tasks: BackgroundTasks, rag: VertexRAGClient = Depends(get_rag)):
+    """
+    Accept a document for processing and return immediately; poll status_url for the DocumentSummary.
+    """
+    if not req.object_name:
+        raise HTTPException(status_code=400, detail="object_name required")
+    job = ProcessJob(job_id=str(uuid.uuid4()), object_name=req.object_name, session_id=req.session_id)
+    await asyncio.to_thread(set_job, job.job_id, PENDING)
+    enqueued = await asyncio.to_thread(enqueue_process_job, job.model_dump())
+    if not enqueued:
+        # no task queue configured: run after the response in this process
+        background_tasks.add_task(_run_job, rag, job)
+    return {"job_id": job.job_id, "status_url": f"/process/status/{job.job_id}"}
+
+
+@router.post("/worker", dependencies=[Depends(require_cloud_tasks)])
+async def process_worker(job: ProcessJob, rag: VertexRAGClient = Depends(get_rag)):
+    """
+    Cloud Tasks target: runs the pipeline and stores the result under the job id.
+    """
+    await _run_job(rag, job)
+    return {"job_id": job.job_id}
+
+
+@router.get("/status/{job_id}", response_model=JobStatus)
+async def process_status(job_id: str):
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    return job
+
+
+@router.post("/stream")
+async def process_doc_stream(req: ProcessRequest, rag: VertexRAGClient = Depends(get_rag)):
+    """
+    Server-sent events variant of /process: one `data:` event per clause as soon as the model
+    finishes it, then `event: done` with title/summary/overall_risk_score/rag_corpus_name.
+    """
+    if not req.object_name:
+        raise HTTPException(status_code=400, detail="object_name required")
+
+    key, cached = await _cached_summary(req.object_name)
+
+    async def events():
+        if cached is not None:
+            for clause in cached.get("clauses", []):
+                yield _sse(clause)
+            yield _sse({k: v for k, v in cached.items() if k != "clauses"}, event="done")
+            return
+
+        it = step = None
+        try:
+            rag_corpus = await _build_corpus(rag, req, key)
+            # the SDK stream is a sync iterator; pull each item from a worker thread
+            it = rag.stream_summary(rag_corpus)
+            clauses = []
+            while True:
+                # shielded so a client disconnect doesn't orphan a next() still running in its thread
+                step = asyncio.ensure_future(asyncio.to_thread(next, it, None))
+                item = await asyncio.shield(step)
+                if item is None:
+                    break
+                kind, payload = item
+                if kind == "clause":
+                    clauses.append(payload)
+                    yield _sse(payload)
+                else:
+                    if key and clauses:
+                        await asyncio.to_thread(set_json, key, {**payload, "clauses": clauses})
+                    yield _sse(payload, event="done")
+        except Exception:
+            logger.exception("streaming summary failed")
+            yield _sse({"detail": "Failed to summarize document"}, event="error")
+        finally:
+            if it is not None:
+                # on disconnect, close the generator off the loop once any in-flight next() is done
+                if step is not None and not step.done():
+                    await asyncio.wait([step])
+                await asyncio.to_thread(it.close)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,16 +1,45 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from google.api_core.exceptions import NotFound
 from typing import Dict
+import asyncio
+import uuid
+
+from ..cache import get_json, set_json, corpus_source_key
+from ..dependencies import get_rag
 from ..rag_client import VertexRAGClient
 
 router = APIRouter(prefix="/query", tags=["query"])
-rag = VertexRAGClient()
+
+
+async def _rebuild_corpus(rag, rag_corpus: str) -> str:
+    """
+    Recreate a corpus that was garbage-collected, using the source recorded by /process,
+    and repoint the cached summary at the new corpus.
+    """
+    source = await asyncio.to_thread(get_json, corpus_source_key(rag_corpus))
+    if not source:
+        raise HTTPException(status_code=404, detail="rag_corpus not found")
+    new_corpus = await rag.create_session_rag_corpus(source["gcs_uri"], "sess-" + str(uuid.uuid4()))
+    await asyncio.to_thread(set_json, corpus_source_key(new_corpus), source)
+    if source.get("summary_key"):
+        summary = await asyncio.to_thread(get_json, source["summary_key"])
+        if summary is not None:
+            summary["rag_corpus_name"] = new_corpus
+            await asyncio.to_thread(set_json, source["summary_key"], summary)
+    return new_corpus
 
 
 @router.post("")
-async def query_doc(req: Dict):
+async def query_doc(req: Dict, rag: VertexRAGClient = Depends(get_rag)):
     question = req.get("question")
     rag_corpus = req.get("rag_corpus")
     if not question or not rag_corpus:
         raise HTTPException(status_code=400, detail="Missing rag_corpus or question")
-    resp = rag.query_rag(rag_corpus, question)
+    try:
+        resp = await rag.aquery_rag(rag_corpus, question)
+    except NotFound:
+        new_corpus = await _rebuild_corpus(rag, rag_corpus)
+        resp = await rag.aquery_rag(new_corpus, question)
+        # tell the client which corpus to use for follow-up questions
+        resp = {**resp, "rag_corpus": new_corpus}
     return resp
@@ -1,16 +1,48 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from typing import Optional
 import uuid
-import os
 
 from ..schemas import UploadResponse
-from ..document_io import generate_signed_upload_url
+from ..document_io import generate_signed_upload_url, delete_blob, get_object_hash, UPLOAD_CONTENT_TYPE
+from ..cache import semantic_cache, store, get_json, summary_key, corpus_source_key
+from ..dependencies import get_rag
+from ..rag_client import VertexRAGClient
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 
 @router.post("", response_model=UploadResponse)
-async def create_upload():
+def create_upload():
+    # plain def: signing is an IAM signBlob RPC under ADC (and the first call builds the
+    # GCS client), so let FastAPI run it in the threadpool
     session_id = str(uuid.uuid4())
     object_name = f"sessions/{session_id}/document.pdf"
-    url = generate_signed_upload_url(object_name)
-    return {"upload_url": url, "object_name": object_name}
+    url = generate_signed_upload_url(object_name, resumable=False)
+    # browser POSTs here (x-goog-resumable: start) for a session URI, then PUTs chunks to it
+    resumable_url = generate_signed_upload_url(object_name, resumable=True)
+    return {
+        "upload_url": url,
+        "object_name": object_name,
+        "resumable_url": resumable_url,
+        "content_type": UPLOAD_CONTENT_TYPE,
+    }
+
+
+@router.delete("")
+def delete_upload(object_name: str, rag_corpus: Optional[str] = None, rag: VertexRAGClient = Depends(get_rag)):
+    # plain def: FastAPI runs it in the threadpool, so the blocking GCS calls don't stall the loop
+    # documents are ephemeral: drop everything derived from them along with the blob.
+    # Only the caller's own corpus is evicted; other sessions may share the same content hash.
+    if rag_corpus:
+        content_hash = get_object_hash(object_name)
+        if content_hash:
+            key = summary_key(content_hash)
+            summary = get_json(key)
+            if summary and summary.get("rag_corpus_name") == rag_corpus:
+                store.delete(key)
+    delete_blob(object_name)
+    if rag_corpus:
+        store.delete(corpus_source_key(rag_corpus))
+        semantic_cache.invalidate(rag_corpus)
+        rag.forget_corpus(rag_corpus)
+    return {"status": "deleted", "object_name": object_name}
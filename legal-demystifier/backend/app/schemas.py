@@ -5,6 +5,8 @@ from typing import Optional, List, Dict
 class UploadResponse(BaseModel):
     upload_url: str
     object_name: str
+    resumable_url: Optional[str] = None
+    content_type: str = "application/pdf"
 
 
 class ProcessRequest(BaseModel):
@@ -26,3 +28,19 @@ class DocumentSummary(BaseModel):
     overall_risk_score: float
     rag_corpus_name: Optional[str] = None
     clauses: List[Clause]
+
+
+class ProcessJob(ProcessRequest):
+    job_id: str
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status_url: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[DocumentSummary] = None
+    detail: Optional[str] = None
@@ -1,6 +1,8 @@
 import os
+import re
 import logging
-from typing import Any, Dict
+import orjson
+from operator import itemgetter
 
 logger = logging.getLogger("legal_demystifier")
 if not logger.handlers:
@@ -11,19 +13,124 @@ if not logger.handlers:
 logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
 
+def _balanced_object_bounds(text: str):
+    """
+    Single forward scan for the first balanced {...} span, skipping braces inside strings.
+    Returns (start, end) or None.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    return None
+
+
 def safe_parse_json(text: str):
-    import json
+    if not isinstance(text, str):
+        return None
     try:
-        return json.loads(text)
-    except Exception:
-        # fallback: try to find JSON object in text
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    # fallback: pull the first balanced JSON object out of surrounding text (e.g. code fences)
+    bounds = _balanced_object_bounds(text)
+    if bounds is not None:
         try:
-            start = text.index("{")
-            end = text.rindex("}") + 1
-            return json.loads(text[start:end])
-        except Exception:
-            logger.exception("Failed to parse JSON from model text")
-            return None
+            return orjson.loads(text[bounds[0]:bounds[1]])
+        except orjson.JSONDecodeError:
+            pass
+    logger.error("Failed to parse JSON from model text")
+    return None
+
+
+_CLAUSES_ARRAY = re.compile(r'"clauses"\s*:\s*\[')
+
+
+class ClauseStreamParser:
+    """
+    Incrementally pull completed objects out of the "clauses" array of a streamed JSON response.
+    feed() each text chunk as it arrives; it returns the clause dicts whose closing brace has been seen.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = None  # scan position once inside the clauses array
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._obj_start = 0
+        self._done = False
+
+    def feed(self, chunk: str):
+        self._buf += chunk
+        out = []
+        if self._done:
+            return out
+        if self._pos is None:
+            m = _CLAUSES_ARRAY.search(self._buf)
+            if not m:
+                return out
+            self._pos = m.end()
+
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        out.append(orjson.loads(buf[self._obj_start:i + 1]))
+                    except orjson.JSONDecodeError:
+                        logger.warning("Skipping malformed streamed clause")
+            elif ch == "]" and self._depth == 0:
+                self._done = True
+                break
+            i += 1
+        self._pos = i
+        return out
+
+
+_get_provenance_fields = itemgetter("text", "page", "start_offset")
+
+
+def _provenance_fields(d):
+    try:
+        return _get_provenance_fields(d)
+    except KeyError:
+        return d.get("text"), d.get("page"), d.get("start_offset")
 
 
 def make_clause_provenance(documents):
@@ -31,8 +138,10 @@ def make_clause_provenance(documents):
     Helper to transform retrieval result pieces into provenance objects.
     'documents' is expected to be list of retrieval chunks/objects.
     """
-    provs = []
-    for d in documents or []:
-        # expected shape: {'text': '...', 'page': n, 'start_offset': x}
-        provs.append({"text": d.get("text"), "page": d.get("page"), "start_offset": d.get("start_offset")})
-    return provs
+    if not documents:
+        return []
+    # expected shape: {'text': '...', 'page': n, 'start_offset': x}
+    return [
+        {"text": t, "page": p, "start_offset": o}
+        for t, p, o in map(_provenance_fields, documents)
+    ]
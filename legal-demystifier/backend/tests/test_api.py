@@ -0,0 +1,103 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+rag_client = pytest.importorskip("app.rag_client")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.api_core.exceptions import NotFound
+
+from app.cache import corpus_source_key, get_json, semantic_cache, set_json, summary_key
+from app.dependencies import get_rag
+from app.routes import query, upload
+
+
+class FakeRAG(rag_client.VertexRAGClient):
+    """VertexRAGClient with the Vertex calls stubbed out; corpora listed in `missing` are gone."""
+
+    def __init__(self, missing):
+        self.missing = set(missing)
+        self.rebuilt_from = []
+
+    def _embed_question(self, question):
+        return None
+
+    def _retrieve(self, rag_corpus_name, question, top_k):
+        if rag_corpus_name in self.missing:
+            # what rag.retrieval_query raises for a deleted corpus
+            try:
+                raise NotFound("corpus not found")
+            except NotFound as e:
+                raise RuntimeError("Failed in retrieving contexts due to: ", e) from e
+        return None
+
+    def _generate_answer(self, rag_corpus_name, question, top_k):
+        return '{"answer": "from %s", "provenance": []}' % rag_corpus_name
+
+    async def create_session_rag_corpus(self, gcs_uri, session_id, display_name=None):
+        self.rebuilt_from.append(gcs_uri)
+        return "projects/p/locations/l/ragCorpora/new"
+
+    def forget_corpus(self, rag_corpus_name):
+        self.forgotten = rag_corpus_name
+
+
+@pytest.fixture
+def client_for():
+    def make(rag):
+        app = FastAPI()
+        app.include_router(query.router)
+        app.include_router(upload.router)
+        app.dependency_overrides[get_rag] = lambda: rag
+        return TestClient(app)
+
+    return make
+
+
+def test_query_rebuilds_corpus_when_retrieval_wraps_not_found(client_for):
+    old = "projects/p/locations/l/ragCorpora/old"
+    set_json(corpus_source_key(old), {"gcs_uri": "gs://bucket/doc.pdf"})
+    rag = FakeRAG(missing=[old])
+
+    resp = client_for(rag).post("/query", json={"rag_corpus": old, "question": "Can I sublet?"})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert rag.rebuilt_from == ["gs://bucket/doc.pdf"]
+    assert body["rag_corpus"] == "projects/p/locations/l/ragCorpora/new"
+    assert body["answer"] == "from projects/p/locations/l/ragCorpora/new"
+    assert get_json(corpus_source_key(body["rag_corpus"])) == {"gcs_uri": "gs://bucket/doc.pdf"}
+
+
+def test_query_missing_corpus_without_source_is_404(client_for):
+    rag = FakeRAG(missing=["projects/p/locations/l/ragCorpora/gone"])
+
+    resp = client_for(rag).post(
+        "/query", json={"rag_corpus": "projects/p/locations/l/ragCorpora/gone", "question": "Can I sublet?"}
+    )
+
+    assert resp.status_code == 404
+
+
+def test_delete_only_evicts_the_callers_corpus(client_for, monkeypatch):
+    mine, theirs = "projects/p/locations/l/ragCorpora/mine", "projects/p/locations/l/ragCorpora/theirs"
+    # another session uploaded the same bytes; the shared summary points at its corpus
+    set_json(summary_key("same-md5"), {"rag_corpus_name": theirs})
+    set_json(corpus_source_key(mine), {"gcs_uri": "gs://bucket/mine.pdf"})
+    set_json(corpus_source_key(theirs), {"gcs_uri": "gs://bucket/theirs.pdf"})
+    semantic_cache.save(mine, "q?", {"answer": "a"})
+    semantic_cache.save(theirs, "q?", {"answer": "b"})
+    monkeypatch.setattr(upload, "get_object_hash", lambda name: "same-md5")
+    monkeypatch.setattr(upload, "delete_blob", lambda name: False)
+    rag = FakeRAG(missing=[])
+
+    resp = client_for(rag).delete("/upload", params={"object_name": "sessions/x/document.pdf", "rag_corpus": mine})
+
+    assert resp.status_code == 200
+    assert rag.forgotten == mine
+    assert get_json(corpus_source_key(mine)) is None
+    assert semantic_cache.get_exact(mine, "q?") is None
+    assert get_json(summary_key("same-md5")) == {"rag_corpus_name": theirs}
+    assert get_json(corpus_source_key(theirs)) == {"gcs_uri": "gs://bucket/theirs.pdf"}
+    assert semantic_cache.get_exact(theirs, "q?") == {"answer": "b"}
@@ -0,0 +1,172 @@
+import pytest
+
+from app import cache
+from app.cache import SemanticCache, _MemoryStore, cache_key, get_json, normalize_question, set_json
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(cache.time, "time", c)
+    return c
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = _MemoryStore()
+    monkeypatch.setattr(cache, "store", s)
+    return s
+
+
+def test_memory_store_get_setex_delete(clock):
+    s = _MemoryStore()
+    s.setex("a", 10, "1")
+    s.setex("b", 10, "2")
+    assert s.get("a") == "1"
+    s.delete("a", "missing")
+    assert s.get("a") is None
+    assert s.get("b") == "2"
+
+
+def test_memory_store_ttl(clock):
+    s = _MemoryStore()
+    s.setex("a", 10, "1")
+    clock.now += 10
+    assert s.get("a") == "1"
+    clock.now += 0.1
+    assert s.get("a") is None
+    assert "a" not in s._data
+
+
+def test_memory_store_get_ignores_hashes(clock):
+    s = _MemoryStore()
+    s.hset("h", "k", "v")
+    assert s.get("h") is None
+
+
+def test_memory_store_hash_ops(clock):
+    s = _MemoryStore()
+    assert s.hgetall("h") == {}
+    s.hset("h", "a", "1")
+    s.hset("h", "b", "2")
+    assert s.hgetall("h") == {"a": "1", "b": "2"}
+    s.hdel("h", "a", "missing")
+    assert s.hgetall("h") == {"b": "2"}
+    s.hdel("missing", "a")
+    assert s.hgetall("missing") == {}
+
+
+def test_memory_store_hash_returns_copy(clock):
+    s = _MemoryStore()
+    s.hset("h", "a", "1")
+    s.hgetall("h")["b"] = "2"
+    assert s.hgetall("h") == {"a": "1"}
+
+
+def test_memory_store_expire(clock):
+    s = _MemoryStore()
+    s.hset("h", "a", "1")
+    s.expire("h", 5)
+    s.expire("missing", 5)
+    clock.now += 6
+    assert s.hgetall("h") == {}
+    assert "missing" not in s._data
+
+
+def test_memory_store_sweeps_expired_keys(clock, monkeypatch):
+    monkeypatch.setattr(cache, "_SWEEP_EVERY", 4)
+    s = _MemoryStore()
+    s.setex("old1", 1, "x")
+    s.setex("old2", 1, "x")
+    clock.now += 2
+    s.setex("new1", 10, "x")
+    assert set(s._data) == {"old1", "old2", "new1"}
+    s.setex("new2", 10, "x")  # 4th write triggers the sweep
+    assert set(s._data) == {"new1", "new2"}
+
+
+def test_memory_store_cap_evicts_soonest_expiring(clock):
+    s = _MemoryStore(max_keys=2)
+    s.setex("long", 100, "x")
+    s.setex("short", 10, "x")
+    s.setex("mid", 50, "x")
+    assert set(s._data) == {"long", "mid"}
+
+
+def test_get_set_json(store, clock):
+    set_json("k", {"a": [1, 2]}, ttl=5)
+    assert get_json("k") == {"a": [1, 2]}
+    assert get_json("missing") is None
+    clock.now += 6
+    assert get_json("k") is None
+
+
+def test_cache_key_and_normalize():
+    assert normalize_question("  Can I   SUBLET? ") == "can i sublet?"
+    assert cache_key("a", "b") != cache_key("b", "a")
+
+
+def test_semantic_cache_exact_hit_is_normalized(store, clock):
+    sc = SemanticCache(threshold=0.9, ttl=60)
+    sc.save("corpus", "Can I sublet?", {"answer": "no"})
+    assert sc.get_exact("corpus", "  can i   SUBLET? ") == {"answer": "no"}
+    assert sc.get_exact("other", "Can I sublet?") is None
+
+
+def test_semantic_cache_find_similar_threshold(store, clock):
+    sc = SemanticCache(threshold=0.9, ttl=60)
+    sc.save("corpus", "Can I sublet?", {"answer": "no"}, embedding=[1.0, 0.0])
+    assert sc.find_similar("corpus", [0.99, 0.1]) == {"answer": "no"}
+    assert sc.find_similar("corpus", [0.5, 0.5]) is None
+    assert sc.find_similar("other", [1.0, 0.0]) is None
+
+
+def test_semantic_cache_find_similar_picks_best(store, clock):
+    sc = SemanticCache(threshold=0.5, ttl=60)
+    sc.save("corpus", "rent?", {"answer": "rent"}, embedding=[1.0, 0.0])
+    sc.save("corpus", "pets?", {"answer": "pets"}, embedding=[0.0, 1.0])
+    assert sc.find_similar("corpus", [0.2, 0.9]) == {"answer": "pets"}
+
+
+def test_semantic_cache_skips_entries_without_embedding(store, clock):
+    sc = SemanticCache(threshold=0.0, ttl=60)
+    sc.save("corpus", "rent?", {"answer": "rent"})
+    assert sc.find_similar("corpus", [1.0, 0.0]) is None
+    assert sc.get_exact("corpus", "rent?") == {"answer": "rent"}
+
+
+def test_semantic_cache_prunes_expired_index_entries(store, clock):
+    sc = SemanticCache(threshold=0.9, ttl=60)
+    sc.save("corpus", "old?", {"answer": "old"}, embedding=[1.0, 0.0])
+    clock.now += 30
+    sc.save("corpus", "new?", {"answer": "new"}, embedding=[0.0, 1.0])
+    clock.now += 31
+    assert sc.find_similar("corpus", [1.0, 0.0]) is None
+    assert list(store.hgetall("qidx:corpus")) == [SemanticCache._key("corpus", "new?")]
+    assert sc.find_similar("corpus", [0.0, 1.0]) == {"answer": "new"}
+
+
+def test_semantic_cache_invalidate(store, clock):
+    sc = SemanticCache(threshold=0.9, ttl=60)
+    sc.save("corpus", "rent?", {"answer": "rent"}, embedding=[1.0, 0.0])
+    sc.save("corpus", "pets?", {"answer": "pets"})
+    sc.save("other", "rent?", {"answer": "other"}, embedding=[1.0, 0.0])
+    sc.invalidate("corpus")
+    assert sc.get_exact("corpus", "rent?") is None
+    assert sc.get_exact("corpus", "pets?") is None
+    assert sc.find_similar("corpus", [1.0, 0.0]) is None
+    assert store.hgetall("qidx:corpus") == {}
+    assert sc.get_exact("other", "rent?") == {"answer": "other"}
+
+
+def test_semantic_cache_invalidate_empty(store, clock):
+    SemanticCache().invalidate("nothing-cached")
+    assert store.hgetall("qidx:nothing-cached") == {}
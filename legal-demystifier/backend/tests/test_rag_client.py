@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+
+rag_client = pytest.importorskip("app.rag_client")
+
+from app.risk_engine import combined_score
+
+
+def _retrieval(*texts):
+    return SimpleNamespace(contexts=SimpleNamespace(contexts=[SimpleNamespace(text=t) for t in texts]))
+
+
+def test_overall_risk_without_retrieval_is_model_score():
+    assert rag_client._overall_risk({"overall_risk_score": 90}) == 90.0
+    assert rag_client._overall_risk({}) == 50.0
+
+
+def test_overall_risk_not_lowered_by_passages_without_keyword_hits():
+    retrieval = _retrieval("The tenant pays rent monthly.", "Pets are allowed.")
+    assert rag_client._overall_risk({"overall_risk_score": 90}, retrieval) == 90.0
+
+
+def test_overall_risk_raised_by_risky_passage():
+    retrieval = _retrieval("Nothing here.", "Tenant waives liability and accepts arbitration and penalties.")
+    assert rag_client._overall_risk({"overall_risk_score": 20}, retrieval) == combined_score(20, 100.0)
+
+
+def test_overall_risk_empty_retrieval():
+    assert rag_client._overall_risk({"overall_risk_score": 30}, _retrieval()) == 30.0
@@ -0,0 +1,89 @@
+import re
+
+import pytest
+
+from app import risk_engine
+from app.risk_engine import (
+    RISK_KEYWORDS,
+    batch_rule_scores,
+    clause_from_llm,
+    combined_score,
+    risk_label,
+    rule_score_for_clause,
+)
+
+SAMPLES = [
+    "",
+    "Nothing risky here.",
+    "The Lessee shall INDEMNIFY the Lessor against all liability.",
+    "Any dispute goes to binding Arbitration; class action waiver applies.",
+    "Late fee of 5% and an early termination fee; the lease will auto-renew.",
+    "Penalties, penalty, indemnification, liabilities, arbitration, waiver, governing law",
+    "Renewal is automatic. Governing law: Delaware.",
+    "Unicode — clause with “quotes” and a penalty",
+]
+
+
+def _reference_score(text: str) -> float:
+    # the original per-pattern scorer every backend must agree with
+    score = 0.0
+    t = text.lower()
+    for kw in RISK_KEYWORDS["high"]:
+        if re.search(kw, t):
+            score += 40
+    for kw in RISK_KEYWORDS["medium"]:
+        if re.search(kw, t):
+            score += 15
+    return min(100.0, score)
+
+
+def test_risk_label_thresholds():
+    assert risk_label(66) == "high"
+    assert risk_label(65.9) == "medium"
+    assert risk_label(33) == "medium"
+    assert risk_label(32.9) == "low"
+
+
+def test_clause_label_follows_llm_score_without_keyword_hits():
+    clause = clause_from_llm({"original": "The tenant shall vacate.", "llm_score": 100}, rule_score=0.0)
+    assert clause["risk"] == "high"
+    assert clause["score"] == combined_score(100, 0.0)
+
+
+def test_clause_defaults():
+    clause = clause_from_llm({"llm_score": None, "provenance": None}, rule_score=40.0)
+    assert clause["original"] == ""
+    assert clause["simplified"] == ""
+    assert clause["risk"] == "medium"
+    assert clause["score"] == combined_score(50.0, 40.0)
+    assert clause["provenance"] == []
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_active_backend_matches_reference(text):
+    assert rule_score_for_clause(text) == _reference_score(text)
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_stdlib_fallback_matches_reference(text, monkeypatch):
+    monkeypatch.setattr(risk_engine, "MATCHER", "re")
+    assert rule_score_for_clause(text) == _reference_score(text)
+
+
+def test_overlapping_patterns_each_count_once():
+    # "class action waiver" also contains "waiv"
+    assert rule_score_for_clause("class action waiver") == 80.0
+
+
+def test_batch_matches_per_clause():
+    assert batch_rule_scores(SAMPLES) == [_reference_score(s) for s in SAMPLES]
+
+
+def test_batch_does_not_leak_hits_across_clauses():
+    scores = batch_rule_scores(["late", "fee", "penalty", "", "nothing"])
+    assert scores == [0.0, 0.0, 40.0, 0.0, 0.0]
+
+
+def test_batch_empty_inputs():
+    assert batch_rule_scores([]) == []
+    assert batch_rule_scores(["", ""]) == [0.0, 0.0]
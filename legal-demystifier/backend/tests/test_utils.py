@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from app.utils import ClauseStreamParser, make_clause_provenance, safe_parse_json
+
+DOC = {
+    "title": "Lease",
+    "summary": "A {short} summary with ] and } inside",
+    "clauses": [
+        {"original": 'Tenant pays "rent" {monthly}', "simplified": "a\\b", "llm_score": 70, "provenance": [{"page": 1}]},
+        {"original": "No pets.", "simplified": "}{", "llm_score": 10, "provenance": []},
+    ],
+    "overall_risk_score": 40,
+}
+
+
+def test_safe_parse_json_plain():
+    assert safe_parse_json(json.dumps(DOC)) == DOC
+
+
+def test_safe_parse_json_embedded_with_braces_in_strings():
+    text = "Here you go:\n```json\n" + json.dumps(DOC) + "\n```\nHope that helps }"
+    assert safe_parse_json(text) == DOC
+
+
+def test_safe_parse_json_escaped_quote_before_brace():
+    assert safe_parse_json('prefix {"a": "x\\"}"} suffix') == {"a": 'x"}'}
+
+
+@pytest.mark.parametrize("text", [None, "", "not json", "{unbalanced", 42])
+def test_safe_parse_json_failure_returns_none(text):
+    assert safe_parse_json(text) is None
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_clause_stream_parser_chunked(size):
+    text = json.dumps(DOC)
+    parser = ClauseStreamParser()
+    got = []
+    for i in range(0, len(text), size):
+        got.extend(parser.feed(text[i:i + size]))
+    assert got == DOC["clauses"]
+
+
+def test_clause_stream_parser_stops_after_array():
+    parser = ClauseStreamParser()
+    got = parser.feed('{"clauses": [{"a": 1}], "extra": [{"b": 2}]}')
+    assert got == [{"a": 1}]
+    assert parser.feed('{"c": 3}') == []
+
+
+def test_make_clause_provenance():
+    assert make_clause_provenance(None) == []
+    assert make_clause_provenance([{"text": "a", "page": 1, "start_offset": 2}, {"text": "b"}]) == [
+        {"text": "a", "page": 1, "start_offset": 2},
+        {"text": "b", "page": None, "start_offset": None},
+    ]